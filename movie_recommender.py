@@ -1,93 +1,174 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
 import pandas as pd
+import numpy as np
 import random
-from difflib import get_close_matches
+from rapidfuzz import process, fuzz
 import re
 import os
 import logging
+import atexit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 MOVIES_CSV = 'movies.csv'
+MOVIES_PARQUET = 'movies.parquet'
 WIKI_URL = "https://en.wikipedia.org/wiki/List_of_films_voted_the_best"
 
+# Shared session: keep-alive connection pooling plus automatic retries,
+# so follow-up requests (e.g. per-movie pages) reuse the same connection
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+_SESSION.headers['User-Agent'] = 'MovieRecommender/1.0 (movie recommendation script)'
+atexit.register(_SESSION.close)
+
+# Patterns compiled once at import so the per-<li> loops skip re's cache lookup
+_RE_HEADING_CLEAN = re.compile(r'\[.*?\]|\s*\(edit\)\s*')
+_RE_TITLE_YEAR = re.compile(r'^(.*?)\s+\((\d{4})\)')
+_RE_SENTENCE = re.compile(r'^([^.!?]+?)(?:\s+was|\s+is|\s+has been|\s+won|\s+received)')
+_RE_YEAR = re.compile(r'\b(19|20)\d{2}\b')
+_RE_PAREN = re.compile(r'\s*\([^)]*\)\s*')
+# Title (Year) | Title - Year | Title, Year as one regex; branch on
+# which named year group matched instead of trying three patterns per item
+_GENERAL_RE = re.compile(
+    r'^(?P<t1>.*?)\s+\((?P<y1>\d{4})\)'
+    r'|^(?P<t2>.*?)\s*-\s*(?P<y2>\d{4})'
+    r'|^(?P<t3>.*?),\s*(?P<y3>\d{4})'
+)
+# Obvious non-movie markers in fallback titles
+_BADWORDS_RE = re.compile(r'\b(?:list|category|section|see also)\b', re.I)
+
+# Containers whose <li> items are navigation/citations, not movies
+_SKIP_PARENT_CLASSES = frozenset(['navbox', 'reflist', 'infobox'])
+
+# Known genre keywords to look for in section headings
+_GENRE_KEYWORDS = {
+    'action': 'Action',
+    'animation': 'Animation',
+    'christmas': 'Christmas',
+    'comedy': 'Comedy',
+    'disaster': 'Disaster',
+    'documentary': 'Documentary',
+    'fantasy': 'Fantasy',
+    'horror': 'Horror',
+    'lgbt': 'LGBT',
+    'musical': 'Musical',
+    'romance': 'Romance',
+    'science fiction': 'Science Fiction',
+    'sci-fi': 'Science Fiction',
+    'silent': 'Silent',
+    'sports': 'Sports',
+    'superhero': 'Superhero',
+    'war': 'War',
+    'western': 'Western'
+}
+# Single alternation so each heading takes one regex pass, not one
+# substring scan per keyword
+_GENRE_RE = re.compile(r'\b(' + '|'.join(map(re.escape, _GENRE_KEYWORDS)) + r')\b')
+
+def _in_ul(element):
+    """Check whether a list item belongs to an unordered list"""
+    parent = element.getparent()
+    while parent is not None:
+        if parent.tag == 'ul':
+            return True
+        parent = parent.getparent()
+    return False
+
+def _in_skip_container(element):
+    """Check whether an element sits inside a navbox/reflist/infobox"""
+    parent = element.getparent()
+    while parent is not None:
+        if parent.tag in ('table', 'div'):
+            classes = parent.get('class')
+            if classes and not _SKIP_PARENT_CLASSES.isdisjoint(classes.split()):
+                return True
+        parent = parent.getparent()
+    return False
+
 def scrape_wikipedia_best_movies(output_csv=MOVIES_CSV):
     """Scrape Wikipedia's 'List of films voted the best' page with proper genre detection"""
     try:
         logger.info(f"Scraping {WIKI_URL}")
-        resp = requests.get(WIKI_URL, timeout=30)
+        resp = _SESSION.get(WIKI_URL, stream=True, timeout=30)
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        # Feed the body into lxml as it arrives instead of materializing
+        # the whole decoded page as one string first
+        parser = lxml.html.HTMLParser()
+        for chunk in resp.iter_content(65536):
+            parser.feed(chunk)
+        root = parser.close()
         
-        movies = []
+        # One list per column so pandas builds typed arrays directly
+        titles, genres, ratings, years = [], [], [], []
+        seen = set()
         current_genre = "General"
-        
-        # Find all headings (h2, h3, h4) and process sequentially
-        all_elements = soup.find_all(['h2', 'h3', 'h4', 'ul'])
-        
-        # Known genre keywords to look for
-        genre_keywords = {
-            'action': 'Action',
-            'animation': 'Animation', 
-            'christmas': 'Christmas',
-            'comedy': 'Comedy',
-            'disaster': 'Disaster',
-            'documentary': 'Documentary',
-            'fantasy': 'Fantasy',
-            'horror': 'Horror',
-            'lgbt': 'LGBT',
-            'musical': 'Musical',
-            'romance': 'Romance',
-            'science fiction': 'Science Fiction',
-            'sci-fi': 'Science Fiction',
-            'silent': 'Silent',
-            'sports': 'Sports',
-            'superhero': 'Superhero',
-            'war': 'War',
-            'western': 'Western'
-        }
-        
+        genre_counts = {}
+
+        # One iterator pass emits headings and list items in document order,
+        # avoiding a second traversal inside every <ul>
+        all_elements = root.iter('h2', 'h3', 'h4', 'li')
+
         logger.info("Processing elements sequentially to match movies with genres...")
-        
+
         for element in all_elements:
-            if element.name in ['h2', 'h3', 'h4']:
-                heading_text = element.get_text().strip().lower()
-                clean_heading = re.sub(r'\[.*?\]', '', heading_text).strip()
-                clean_heading = re.sub(r'\s*\(edit\)\s*', '', clean_heading).strip()
-                
+            if element.tag in ('h2', 'h3', 'h4'):
+                heading_text = ' '.join(element.text_content().split()).lower()
+                clean_heading = _RE_HEADING_CLEAN.sub('', heading_text).strip()
+
                 # Check if this heading matches any genre keyword
-                for keyword, genre_name in genre_keywords.items():
-                    if keyword in clean_heading:
-                        current_genre = genre_name
-                        logger.info(f"Found genre section: '{clean_heading}' -> {genre_name}")
-                        break
-                        
-            elif element.name == 'ul' and current_genre != "General":
-                # Extract movies from this list under the current genre
-                movie_count = 0
-                for li in element.find_all('li'):
-                    movie_data = extract_movie_from_li(li, current_genre)
-                    if movie_data:
-                        movies.append(movie_data)
-                        movie_count += 1
-                
-                if movie_count > 0:
-                    logger.info(f"Found {movie_count} movies in {current_genre}")
+                keyword_match = _GENRE_RE.search(clean_heading)
+                if keyword_match:
+                    current_genre = _GENRE_KEYWORDS[keyword_match.group(1)]
+                    logger.info(f"Found genre section: '{clean_heading}' -> {current_genre}")
+
+            elif current_genre != "General":
+                # Only harvest <ul> items (as the old 'ul li' selector did)
+                # and skip navbox/reference/infobox lists entirely
+                if not _in_ul(element) or _in_skip_container(element):
+                    continue
+
+                # List item under a genre section
+                movie_data = extract_movie_from_li(element, current_genre)
+                if movie_data:
+                    title, genre, rating, year = movie_data
+                    # Dedupe on the stream instead of drop_duplicates later
+                    if (title, year) in seen:
+                        continue
+                    seen.add((title, year))
+                    titles.append(title)
+                    genres.append(genre)
+                    ratings.append(rating)
+                    years.append(year)
+                    genre_counts[current_genre] = genre_counts.get(current_genre, 0) + 1
+
+        for genre_name, movie_count in genre_counts.items():
+            logger.info(f"Found {movie_count} movies in {genre_name}")
         
         # If no genre-specific movies found, fall back to general scraping
-        if not movies:
+        if not titles:
             logger.info("No genre-specific movies found, using general approach...")
-            return scrape_general_movies(soup, output_csv)
-        
+            return scrape_general_movies(root, output_csv)
+
         # Create DataFrame and save
-        df = pd.DataFrame(movies, columns=['Title', 'Genre', 'Rating', 'Year'])
-        df = df.drop_duplicates(subset=['Title', 'Year'])
+        df = pd.DataFrame({
+            'Title': titles,
+            'Genre': genres,
+            'Rating': ratings,
+            'Year': pd.array(pd.to_numeric(years, errors='coerce'), dtype='Int16'),
+        })
         df = df[df['Title'].str.len() > 0]
         
         df.to_csv(output_csv, index=False)
+        # Parquet keeps the typed columns, so reloads skip text parsing
+        df.to_parquet(MOVIES_PARQUET, compression='zstd')
         logger.info(f"Successfully scraped {len(df)} movies across {len(df['Genre'].unique())} genres")
         print(f"Successfully scraped {len(df)} movies from Wikipedia!")
         print(f"Found genres: {', '.join(sorted(df['Genre'].unique()))}")
@@ -98,40 +179,46 @@ def scrape_wikipedia_best_movies(output_csv=MOVIES_CSV):
         print(f"Scraping error: {e}")
         return None
 
-def scrape_general_movies(soup, output_csv):
+def scrape_general_movies(root, output_csv):
     """Fallback scraping for general movie data"""
     try:
         movies = []
-        
-        # Look for movie patterns in all list items
-        for ul in soup.find_all('ul'):
-            for li in ul.find_all('li'):
-                text = li.get_text(" ", strip=True)
-                
-                # Look for movie title patterns
-                patterns = [
-                    r'^(.*?)\s+\((\d{4})\)',  # Title (Year)
-                    r'^(.*?)\s*-\s*(\d{4})',  # Title - Year
-                    r'^(.*?),\s*(\d{4})',     # Title, Year
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, text)
-                    if match:
-                        title = match.group(1).strip()
-                        year = match.group(2)
-                        
-                        # Skip very short titles or obvious non-movies
-                        if len(title) < 3 or any(word in title.lower() for word in ['list', 'category', 'section', 'see also']):
-                            continue
-                            
-                        movies.append([title, "General", "N/A", year])
+        seen = set()
+
+        # Look for movie patterns in all unordered-list items
+        for li in root.iter('li'):
+            if not _in_ul(li):
+                continue
+
+            # text_content() concatenates the subtree text in one C call;
+            # split/join collapses the whitespace
+            text = ' '.join(li.text_content().split())
+
+            # Look for movie title patterns
+            match = _GENERAL_RE.search(text)
+            if not match:
+                continue
+
+            groups = match.groupdict()
+            for title_key, year_key in (('t1', 'y1'), ('t2', 'y2'), ('t3', 'y3')):
+                if groups[year_key]:
+                    title = groups[title_key].strip()
+                    year = groups[year_key]
+
+                    # Skip very short titles, obvious non-movies and repeats
+                    if len(title) < 3 or _BADWORDS_RE.search(title) or (title, year) in seen:
                         break
+
+                    seen.add((title, year))
+                    movies.append([title, "General", "N/A", year])
+                    break
         
         if movies:
             df = pd.DataFrame(movies, columns=['Title', 'Genre', 'Rating', 'Year'])
-            df = df.drop_duplicates(subset=['Title', 'Year'])
             df.to_csv(output_csv, index=False)
+            # Refresh the parquet copy too, otherwise load_and_clean_movies
+            # would prefer a stale movies.parquet over the CSV just written
+            df.to_parquet(MOVIES_PARQUET, compression='zstd')
             logger.info(f"General scraping saved {len(df)} movies")
             print(f"Found {len(df)} movies with general scraping!")
             return df
@@ -147,44 +234,51 @@ def scrape_general_movies(soup, output_csv):
 def extract_movie_from_li(li, genre):
     """Extract movie information from a list item"""
     try:
-        text = li.get_text(" ", strip=True)
-        
+        text = ' '.join(li.text_content().split())
+
         # Primary pattern: Title (Year)
-        match = re.match(r"^(.*?)\s+\((\d{4})\)", text)
+        match = _RE_TITLE_YEAR.match(text)
         if match:
             title = match.group(1).strip()
             year = match.group(2)
-            return [title, genre, "N/A", year]
+            return (title, genre, "N/A", year)
         
         # Secondary pattern: Title mentioned in sentences
-        sentence_match = re.match(r"^([^.!?]+?)(?:\s+was|\s+is|\s+has been|\s+won|\s+received)", text)
+        sentence_match = _RE_SENTENCE.match(text)
         if sentence_match:
             title = sentence_match.group(1).strip()
-            title = re.sub(r'\s*\([^)]*\)\s*', ' ', title).strip()
-            year_match = re.search(r'\b(19|20)\d{2}\b', text)
+            title = _RE_PAREN.sub(' ', title).strip()
+            year_match = _RE_YEAR.search(text)
             year = year_match.group(0) if year_match else ""
             
             if len(title) > 2:
-                return [title, genre, "N/A", year]
+                return (title, genre, "N/A", year)
         
         return None
         
     except Exception as e:
         return None
 
-def load_and_clean_movies(csv_file=MOVIES_CSV):
-    """Load and clean movie data from CSV"""
+def load_and_clean_movies(csv_file=MOVIES_CSV, parquet_file=MOVIES_PARQUET):
+    """Load and clean movie data, preferring Parquet over CSV"""
     try:
-        if not os.path.exists(csv_file):
+        if parquet_file and os.path.exists(parquet_file):
+            df = pd.read_parquet(parquet_file)
+        elif os.path.exists(csv_file):
+            # Arrow-backed strings: contiguous UTF-8 buffers instead of one
+            # Python str object per cell, with C++ .str kernels downstream
+            df = pd.read_csv(csv_file, dtype_backend='pyarrow',
+                             dtype={'Title': 'string[pyarrow]', 'Genre': 'string[pyarrow]'})
+        else:
             return None
-            
-        df = pd.read_csv(csv_file)
+
         if df.empty:
             return None
         
         # Clean the data
         df.dropna(subset=['Title', 'Genre'], inplace=True)
-        df['Genre'] = df['Genre'].str.lower().str.replace(' ', '')
+        # Categorical stores one small int per row instead of a Python string
+        df['Genre'] = df['Genre'].str.lower().str.replace(' ', '').astype('category')
         df.drop_duplicates(subset=['Title', 'Year'], inplace=True)
         
         return df
@@ -196,35 +290,44 @@ def load_and_clean_movies(csv_file=MOVIES_CSV):
 def filter_movies_by_genres(df, genres):
     """Filter movies by selected genres"""
     genres = [g.strip().lower().replace(' ', '') for g in genres]
-    mask = df['Genre'].apply(lambda g: any(gen in str(g).lower() for gen in genres))
+    # One alternation regex evaluated in C instead of a Python lambda per row
+    pattern = '|'.join(re.escape(g) for g in genres)
+    # Genre is already lowercased/stripped by load_and_clean_movies, so no
+    # per-row normalization is needed here
+    genre_col = df['Genre']
+    if isinstance(genre_col.dtype, pd.CategoricalDtype):
+        # Match once per category, then compare integer codes per row
+        matching = genre_col.cat.categories.str.contains(pattern, regex=True, na=False)
+        mask = genre_col.cat.codes.isin(np.where(matching)[0])
+    else:
+        mask = genre_col.str.contains(pattern, regex=True, na=False)
     return df[mask]
 
 def get_all_genres(df):
     """Get all unique genres from the dataset"""
-    genres = set()
-    for g in df['Genre'].dropna():
-        genre_parts = str(g).split(',')
-        for part in genre_parts:
-            clean_genre = part.strip().lower()
-            if clean_genre and clean_genre not in ["unknown", "n/a"]:
-                genres.add(clean_genre)
-    return list(genres)
+    s = df['Genre'].dropna().astype(str).str.split(',').explode().str.strip().str.lower()
+    s = s[s.ne('') & ~s.isin(['unknown', 'n/a'])]
+    return s.unique().tolist()
 
 def get_genre_suggestions(chosen_genres, all_genres, cutoff=0.6):
     """Get suggestions for similar genres when no matches found"""
     suggestions = {}
     for genre in chosen_genres:
-        matches = get_close_matches(genre.lower(), all_genres, n=3, cutoff=cutoff)
+        matches = process.extract(genre.lower(), all_genres, scorer=fuzz.WRatio,
+                                  limit=3, score_cutoff=cutoff * 100)
         if matches:
-            suggestions[genre] = matches
+            suggestions[genre] = [match for match, score, _ in matches]
     return suggestions
 
-def recommend_movies(df, chosen_genres, num_recommendations=5):
+def recommend_movies(df, chosen_genres, num_recommendations=5, all_genres=None):
     """Get movie recommendations based on chosen genres"""
     filtered = filter_movies_by_genres(df, chosen_genres)
-    
+
     if filtered.empty:
-        all_genres = get_all_genres(df)
+        # Caller can pass the precomputed genre list; df never changes in
+        # the REPL loop so there is no need to rebuild it per attempt
+        if all_genres is None:
+            all_genres = get_all_genres(df)
         suggestions = get_genre_suggestions(chosen_genres, all_genres)
         
         print("\nNo movies found for your genre(s).")
@@ -242,14 +345,14 @@ def recommend_movies(df, chosen_genres, num_recommendations=5):
     sample_size = min(num_recommendations, len(filtered))
     recommendations = filtered.sample(sample_size)
     
-    # Display recommendations
-    for i, (_, movie) in enumerate(recommendations.iterrows(), 1):
-        print(f"{i}. {movie['Title']}")
-        print(f"   Genre: {movie['Genre']}")
-        if pd.notna(movie['Year']) and movie['Year']:
-            print(f"   Year: {movie['Year']}")
-        if pd.notna(movie['Rating']) and movie['Rating'] != 'N/A':
-            print(f"   Rating: {movie['Rating']}")
+    # Display recommendations (itertuples avoids building a Series per row)
+    for i, movie in enumerate(recommendations.itertuples(index=False), 1):
+        print(f"{i}. {movie.Title}")
+        print(f"   Genre: {movie.Genre}")
+        if pd.notna(movie.Year) and movie.Year:
+            print(f"   Year: {movie.Year}")
+        if pd.notna(movie.Rating) and movie.Rating != 'N/A':
+            print(f"   Rating: {movie.Rating}")
         print()
 
 def main():
@@ -264,12 +367,15 @@ def main():
     print("📥 DATA SETUP")
     print("-" * 20)
     
-    if os.path.exists(MOVIES_CSV):
+    if os.path.exists(MOVIES_PARQUET) or os.path.exists(MOVIES_CSV):
         try:
-            df_check = pd.read_csv(MOVIES_CSV)
+            if os.path.exists(MOVIES_PARQUET):
+                df_check = pd.read_parquet(MOVIES_PARQUET)
+            else:
+                df_check = pd.read_csv(MOVIES_CSV)
             if not df_check.empty:
                 print(f"✓ Found existing data: {len(df_check)} movies")
-                print("Using existing data. Delete 'movies.csv' to scrape fresh data.\n")
+                print("Using existing data. Delete 'movies.parquet'/'movies.csv' to scrape fresh data.\n")
             else:
                 print("📥 Existing CSV file is empty, scraping fresh data...")
                 result = scrape_wikipedia_best_movies()
@@ -338,7 +444,7 @@ def main():
                 continue
             
             print(f"\n🔍 Searching for movies in: {', '.join(chosen_genres)}")
-            recommend_movies(df, chosen_genres)
+            recommend_movies(df, chosen_genres, all_genres=genres)
             
             print("-" * 50)
             